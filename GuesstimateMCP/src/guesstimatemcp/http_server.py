@@ -2,15 +2,22 @@
 
 import asyncio
 import os
-import httpx
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import uvicorn
 
+from .tools import calculate, create_http_client, tavily_search
+
 # Tool request/response models
 class CalculatorRequest(BaseModel):
     expression: str
 
+class CalculatorBatchRequest(BaseModel):
+    expressions: list[str]
+
 class WebSearchRequest(BaseModel):
     query: str
 
@@ -19,82 +26,63 @@ class ToolResponse(BaseModel):
     success: bool = True
     error: str = None
 
-app = FastAPI(title="GuesstimateMCP HTTP Server", version="1.0.0")
-
-def calculate(expression: str) -> float:
-    """Safely evaluate arithmetic expressions"""
-    import math
-    allowed_chars = set('0123456789+-*/.()% sqrt')
-    if not all(c in allowed_chars for c in expression):
-        raise ValueError("Invalid characters in expression")
-    
-    # Replace sqrt with math.sqrt
-    expression = expression.replace('sqrt', 'math.sqrt')
-    
-    # Create safe namespace
-    safe_dict = {"__builtins__": {}, "math": math}
-    return eval(expression, safe_dict)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled HTTP client across requests for the app's lifetime"""
+    app.state.http = create_http_client()
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
 
-async def tavily_search(query: str) -> str:
-    """Search the web using Tavily API"""
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        return "Error: TAVILY_API_KEY environment variable not set"
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://api.tavily.com/search",
-                json={
-                    "api_key": api_key,
-                    "query": query,
-                    "search_depth": "basic",
-                    "include_answer": True,
-                    "max_results": 5
-                },
-                timeout=10.0
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if "answer" in data and data["answer"]:
-                return f"Answer: {data['answer']}\n\nSources: {', '.join([r['url'] for r in data.get('results', [])])}"
-            else:
-                results = data.get("results", [])
-                if results:
-                    return "\n\n".join([f"Title: {r['title']}\nURL: {r['url']}\nContent: {r['content'][:200]}..." for r in results[:3]])
-                else:
-                    return "No results found"
-        except Exception as e:
-            return f"Search error: {str(e)}"
+app = FastAPI(
+    title="GuesstimateMCP HTTP Server",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+app.add_middleware(GZipMiddleware, minimum_size=512)
 
 @app.get("/")
-async def root():
+def root():
     return {"message": "GuesstimateMCP HTTP Server", "tools": ["calculator", "web-search"]}
 
-@app.post("/tools/calculator", response_model=ToolResponse)
-async def calculator_tool(request: CalculatorRequest):
+def _calculator_response(expression: str) -> ToolResponse:
     try:
-        result = calculate(request.expression)
-        return ToolResponse(result=f"{request.expression} = {result}")
+        result = calculate(expression)
+        return ToolResponse(result=f"{expression} = {result}")
     except Exception as e:
         return ToolResponse(result="", success=False, error=str(e))
 
+@app.post("/tools/calculator", response_model=ToolResponse)
+def calculator_tool(request: CalculatorRequest):
+    return _calculator_response(request.expression)
+
+@app.post("/tools/calculator/batch", response_model=list[ToolResponse])
+def calculator_batch_tool(request: CalculatorBatchRequest):
+    return [_calculator_response(expression) for expression in request.expressions]
+
 @app.post("/tools/web-search", response_model=ToolResponse)
-async def web_search_tool(request: WebSearchRequest):
+async def web_search_tool(request: WebSearchRequest, http_request: Request):
     try:
-        result = await tavily_search(request.query)
+        result = await tavily_search(request.query, http_request.app.state.http)
         return ToolResponse(result=result)
     except Exception as e:
         return ToolResponse(result="", success=False, error=str(e))
 
 @app.get("/health")
-async def health_check():
+def health_check():
     return {"status": "healthy"}
 
 def main():
     """Run the HTTP server"""
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Caches are per worker process, so each worker warms its own.
+    # "auto" picks uvloop/httptools when installed (not available on Windows).
+    uvicorn.run(
+        "guesstimatemcp.http_server:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="auto",
+        http="auto"
+    )
@@ -1,6 +1,4 @@
 import asyncio
-import os
-import httpx
 
 from mcp.server.models import InitializationOptions
 import mcp.types as types
@@ -8,55 +6,16 @@ from mcp.server import NotificationOptions, Server
 from pydantic import AnyUrl
 import mcp.server.stdio
 
+from .tools import calculate, create_http_client, tavily_search
+
 # Store notes as a simple key-value dict to demonstrate state management
 notes: dict[str, str] = {}
 
-def calculate(expression: str) -> float:
-    """Safely evaluate arithmetic expressions"""
-    import math
-    allowed_chars = set('0123456789+-*/.()% sqrt')
-    if not all(c in allowed_chars for c in expression):
-        raise ValueError("Invalid characters in expression")
-    
-    # Replace sqrt with math.sqrt
-    expression = expression.replace('sqrt', 'math.sqrt')
-    
-    # Create safe namespace
-    safe_dict = {"__builtins__": {}, "math": math}
-    return eval(expression, safe_dict)
+# Derived views of notes, rebuilt lazily after add-note invalidates them
+_notes_summary_cache: str | None = None
+_notes_resources_cache: list[types.Resource] | None = None
 
-async def tavily_search(query: str) -> str:
-    """Search the web using Tavily API"""
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        return "Error: TAVILY_API_KEY environment variable not set"
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://api.tavily.com/search",
-                json={
-                    "api_key": api_key,
-                    "query": query,
-                    "search_depth": "basic",
-                    "include_answer": True,
-                    "max_results": 5
-                },
-                timeout=10.0
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if "answer" in data and data["answer"]:
-                return f"Answer: {data['answer']}\n\nSources: {', '.join([r['url'] for r in data.get('results', [])])}"
-            else:
-                results = data.get("results", [])
-                if results:
-                    return "\n\n".join([f"Title: {r['title']}\nURL: {r['url']}\nContent: {r['content'][:200]}..." for r in results[:3]])
-                else:
-                    return "No results found"
-        except Exception as e:
-            return f"Search error: {str(e)}"
+http_client = create_http_client()
 
 server = Server("GuesstimateMCP")
 
@@ -66,15 +25,18 @@ async def handle_list_resources() -> list[types.Resource]:
     List available note resources.
     Each note is exposed as a resource with a custom note:// URI scheme.
     """
-    return [
-        types.Resource(
-            uri=AnyUrl(f"note://internal/{name}"),
-            name=f"Note: {name}",
-            description=f"A simple note named {name}",
-            mimeType="text/plain",
-        )
-        for name in notes
-    ]
+    global _notes_resources_cache
+    if _notes_resources_cache is None:
+        _notes_resources_cache = [
+            types.Resource(
+                uri=AnyUrl(f"note://internal/{name}"),
+                name=f"Note: {name}",
+                description=f"A simple note named {name}",
+                mimeType="text/plain",
+            )
+            for name in notes
+        ]
+    return _notes_resources_cache
 
 @server.read_resource()
 async def handle_read_resource(uri: AnyUrl) -> str:
@@ -125,6 +87,13 @@ async def handle_get_prompt(
     style = (arguments or {}).get("style", "brief")
     detail_prompt = " Give extensive details." if style == "detailed" else ""
 
+    global _notes_summary_cache
+    if _notes_summary_cache is None:
+        _notes_summary_cache = "\n".join(
+            f"- {name}: {content}"
+            for name, content in notes.items()
+        )
+
     return types.GetPromptResult(
         description="Summarize the current notes",
         messages=[
@@ -133,10 +102,7 @@ async def handle_get_prompt(
                 content=types.TextContent(
                     type="text",
                     text=f"Here are the current notes to summarize:{detail_prompt}\n\n"
-                    + "\n".join(
-                        f"- {name}: {content}"
-                        for name, content in notes.items()
-                    ),
+                    + _notes_summary_cache,
                 ),
             )
         ],
@@ -203,7 +169,10 @@ async def handle_call_tool(
         if not note_name or not content:
             raise ValueError("Missing name or content")
 
+        global _notes_summary_cache, _notes_resources_cache
         notes[note_name] = content
+        _notes_summary_cache = None
+        _notes_resources_cache = None
         await server.request_context.session.send_resource_list_changed()
 
         return [
@@ -239,7 +208,7 @@ async def handle_call_tool(
         if not query:
             raise ValueError("Missing query")
         
-        result = await tavily_search(query)
+        result = await tavily_search(query, http_client)
         return [
             types.TextContent(
                 type="text",
@@ -252,7 +221,7 @@ async def handle_call_tool(
 
 async def main():
     # Run the server using stdin/stdout streams
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+    async with http_client, mcp.server.stdio.stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream,
             write_stream,
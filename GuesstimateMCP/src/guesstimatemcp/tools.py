@@ -0,0 +1,157 @@
+"""Calculator and web-search tools shared by the MCP and HTTP servers"""
+
+import ast
+import math
+import operator
+import os
+import threading
+import time
+import httpx
+import orjson
+
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create a long-lived client so repeated searches reuse pooled keep-alive connections"""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60.0),
+        timeout=10.0,
+        headers={"User-Agent": "guesstimatemcp/0.1", "Accept-Encoding": "gzip, br"}
+    )
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+SEARCH_CACHE_TTL = 300.0
+CALC_CACHE_TTL = 3600.0
+CACHE_MAX_ENTRIES = 1024
+
+_MISS = object()
+_search_cache: dict[str, tuple[float, str]] = {}
+_calc_cache: dict[str, tuple[float, float]] = {}
+# Sync HTTP handlers run in a threadpool, so cache access must be serialized
+_cache_lock = threading.Lock()
+
+def _cache_get(cache: dict, key: str):
+    """Return an unexpired cached value, or _MISS"""
+    with _cache_lock:
+        entry = cache.get(key)
+        if entry is None:
+            return _MISS
+        expiry, value = entry
+        if time.monotonic() >= expiry:
+            del cache[key]
+            return _MISS
+        return value
+
+def _cache_set(cache: dict, key: str, value, ttl: float):
+    """Store a value with a TTL, evicting the oldest entry when full"""
+    with _cache_lock:
+        if key not in cache and len(cache) >= CACHE_MAX_ENTRIES:
+            del cache[next(iter(cache))]
+        cache[key] = (time.monotonic() + ttl, value)
+
+MAX_EXPONENT = 100
+MAX_RESULT_BITS = 4096
+
+def _safe_pow(base: float, exponent: float) -> float:
+    """Raise to a power, rejecting exponents that would be slow or huge to compute"""
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"Exponent too large (max {MAX_EXPONENT})")
+    if isinstance(base, int) and isinstance(exponent, int) and base.bit_length() * exponent > MAX_RESULT_BITS:
+        raise ValueError("Result too large")
+    return operator.pow(base, exponent)
+
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _safe_pow,
+}
+
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_FUNCTIONS = {"sqrt": math.sqrt}
+
+_ALLOWED_CHARS = frozenset('0123456789+-*/.()% sqrt')
+# Deletes every allowed character; anything left over is invalid
+_STRIP_ALLOWED = str.maketrans('', '', ''.join(_ALLOWED_CHARS))
+
+# Expressions contain only literals, so each one is a constant: results are
+# memoized per expression string (see calculate) rather than JIT-compiled.
+def _safe_eval(node: ast.AST) -> float:
+    """Evaluate an arithmetic AST node against an allowlist of operations"""
+    if isinstance(node, ast.Expression):
+        return _safe_eval(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        return _BIN_OPS[type(node.op)](_safe_eval(node.left), _safe_eval(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_safe_eval(node.operand))
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS and len(node.args) == 1 and not node.keywords):
+        return _FUNCTIONS[node.func.id](_safe_eval(node.args[0]))
+    raise ValueError(f"Unsupported expression element: {ast.dump(node)}")
+
+def calculate(expression: str) -> float:
+    """Safely evaluate arithmetic expressions"""
+    # Validate before the cache lookup so acceptance never depends on cache state
+    if expression.translate(_STRIP_ALLOWED):
+        raise ValueError("Invalid characters in expression")
+    
+    key = expression.strip()
+    cached = _cache_get(_calc_cache, key)
+    if cached is not _MISS:
+        return cached
+    
+    result = _safe_eval(ast.parse(key, mode="eval"))
+    _cache_set(_calc_cache, key, result, CALC_CACHE_TTL)
+    return result
+
+async def tavily_search(query: str, client: httpx.AsyncClient) -> str:
+    """Search the web using Tavily API"""
+    if not TAVILY_API_KEY:
+        return "Error: TAVILY_API_KEY environment variable not set"
+    
+    key = query.strip().lower()
+    cached = _cache_get(_search_cache, key)
+    if cached is not _MISS:
+        return cached
+    
+    try:
+        response = await client.post(
+            "https://api.tavily.com/search",
+            headers=_JSON_HEADERS,
+            content=orjson.dumps({
+                "api_key": TAVILY_API_KEY,
+                "query": query,
+                "search_depth": "basic",
+                "include_answer": True,
+                "include_raw_content": False,
+                "include_images": False,
+                "max_results": 3
+            })
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+        if "answer" in data and data["answer"]:
+            result = f"Answer: {data['answer']}\n\nSources: {', '.join([r['url'] for r in data.get('results', [])])}"
+        else:
+            results = data.get("results", [])
+            if results:
+                result = "\n\n".join([f"Title: {r['title']}\nURL: {r['url']}\nContent: {r['content'][:200]}..." for r in results[:3]])
+            else:
+                result = "No results found"
+        
+        _cache_set(_search_cache, key, result, SEARCH_CACHE_TTL)
+        return result
+    except Exception as e:
+        return f"Search error: {str(e)}"
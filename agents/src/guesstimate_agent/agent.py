@@ -1,26 +1,89 @@
 """LangGraph agent for solving guesstimate problems"""
 
 import os
+import re
+import sys
+import atexit
+import hashlib
 import asyncio
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, Any, List
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-import json
-from datetime import datetime
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
 import httpx
+import orjson
+from diskcache import Cache
+
+# Patterns used to pull calculator expressions out of LLM responses
+_EQ_RE = re.compile(r'([\d\+\-\*/\(\)\.\s%sqrt]+)\s*=')
+_NUM_RE = re.compile(r'\d+(?:\.\d+)?\s*[\+\-\*/]\s*\d+(?:\.\d+)?')
+_SQRT_RE = re.compile(r'sqrt\(\d+(?:\.\d+)?\)')
+_NUM_EXTRACT = re.compile(r'[-+]?\d*\.?\d+')
+# Prose pre-screen: frozenset.isdisjoint scans in C and stops at the first
+# operator without allocating, unlike a str.translate-and-compare check
+_OPERATOR_CHARS = frozenset('+-*/=')
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Log records are queued and written to stdout by a background thread so
+# logging never blocks the event loop on console I/O
+_log_queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.setFormatter(logging.Formatter("[%(asctime)s] %(tag)s: %(message)s", datefmt="%H:%M:%S"))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+log = logging.getLogger("guesstimate")
+log.addHandler(QueueHandler(_log_queue))
+log.setLevel(logging.INFO)
+log.propagate = False
+
+def flush_logs():
+    """Block until every queued log record has been written to stdout"""
+    _log_queue.join()
+    _log_handler.flush()
 
 class GuesstimateSolver:
-    def __init__(self, openai_api_key: str = None, server_url: str = "http://localhost:8000"):
+    def __init__(self, openai_api_key: str = None, server_url: str = "http://localhost:8000",
+                 llm_cache_dir: str = ".llm_cache", llm_cache_ttl: float = 24 * 60 * 60):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         self.server_url = server_url
+        self.http = httpx.AsyncClient(
+            base_url=server_url,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
         self.llm = ChatOpenAI(api_key=self.openai_api_key, model="gpt-3.5-turbo")
+        # Pass llm_cache_dir=None to always query the LLM
+        self.llm_cache = Cache(llm_cache_dir) if llm_cache_dir else None
+        self.llm_cache_ttl = llm_cache_ttl
         self.graph = self._build_graph()
     
+    async def warmup(self):
+        """Open a pooled connection to the tool server ahead of the first tool call
+        
+        Failures are ignored: this runs while the menu is on screen, and an
+        unreachable server is reported by the first real tool call instead.
+        """
+        try:
+            response = await self.http.get("/health")
+            response.raise_for_status()
+        except Exception:
+            pass
+    
+    async def aclose(self):
+        """Close the pooled HTTP client and the LLM response cache"""
+        await self.http.aclose()
+        if self.llm_cache is not None:
+            self.llm_cache.close()
+    
     def _log(self, message: str, level: str = "INFO"):
         """Log messages with timestamp"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] {level}: {message}")
+        log.log(getattr(logging, level, logging.INFO), message, extra={"tag": level})
     
     def _log_node(self, node_name: str, status: str = "STARTED"):
         """Log node activation"""
@@ -34,30 +97,52 @@ class GuesstimateSolver:
         """Log MCP tool usage"""
         self._log(f"[MCP] {tool_name}: {action}", "MCP")
     
-    async def _call_http_tool(self, endpoint: str, data: dict) -> str:
-        """Call HTTP tool endpoint"""
+    async def _invoke_llm(self, prompt: str) -> AIMessage:
+        """Invoke the LLM with a system prompt, reusing cached responses for identical prompts"""
+        if self.llm_cache is None:
+            return await self.llm.ainvoke([SystemMessage(content=prompt)])
+        
+        # diskcache does blocking SQLite I/O, so keep it off the event loop
+        key = hashlib.sha256(f"{self.llm.model_name}\0{prompt}".encode()).hexdigest()
+        cached = await asyncio.to_thread(self.llm_cache.get, key)
+        if cached is not None:
+            self._log_llm("Cache hit - reusing stored response")
+            return AIMessage(content=cached)
+        
+        response = await self.llm.ainvoke([SystemMessage(content=prompt)])
+        await asyncio.to_thread(self.llm_cache.set, key, response.content, expire=self.llm_cache_ttl)
+        return response
+    
+    async def _post_tool(self, endpoint: str, data: dict) -> Any:
+        """POST to an HTTP tool endpoint and return the decoded JSON body
+        
+        Transport, status and decode errors are logged and re-raised.
+        """
         self._log(f"[HTTP] Calling endpoint: {endpoint}")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.server_url}/tools/{endpoint}",
-                    json=data,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                if result.get("success", True):
-                    self._log(f"[HTTP] Tool {endpoint} SUCCESS")
-                    return result.get("result", "")
-                else:
-                    self._log(f"[HTTP] Tool {endpoint} FAILED - {result.get('error', 'Unknown error')}")
-                    return f"Error: {result.get('error', 'Unknown error')}"
-                    
+            response = await self.http.post(
+                f"/tools/{endpoint}", headers=_JSON_HEADERS, content=orjson.dumps(data)
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
         except Exception as e:
             self._log(f"[HTTP] Tool {endpoint} FAILED - {str(e)}")
+            raise
+    
+    async def _call_http_tool(self, endpoint: str, data: dict) -> str:
+        """Call HTTP tool endpoint"""
+        try:
+            result = await self._post_tool(endpoint, data)
+        except Exception as e:
             return f"Error calling {endpoint}: {str(e)}"
+        
+        if result.get("success", True):
+            self._log(f"[HTTP] Tool {endpoint} SUCCESS")
+            return result.get("result", "")
+        else:
+            self._log(f"[HTTP] Tool {endpoint} FAILED - {result.get('error', 'Unknown error')}")
+            return f"Error: {result.get('error', 'Unknown error')}"
     
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow"""
@@ -100,10 +185,10 @@ class GuesstimateSolver:
         """
         
         self._log_llm("Analyzing problem structure and components")
-        response = await self.llm.ainvoke([SystemMessage(content=prompt)])
+        response = await self._invoke_llm(prompt)
         
         try:
-            analysis = json.loads(response.content)
+            analysis = orjson.loads(response.content)
         except:
             analysis = {
                 "target": "Unknown estimation target",
@@ -120,15 +205,21 @@ class GuesstimateSolver:
         """Research relevant information using web search"""
         self._log_node("research")
         research_needs = state["analysis"].get("research_needs", [])
-        research_results = {}
+        research_needs = research_needs[:3]  # Limit to 3 searches
         
-        for need in research_needs[:3]:  # Limit to 3 searches
-            try:
-                self._log(f"[SEARCH] Web Search: {need}")
-                result = await self._web_search(need)
+        for need in research_needs:
+            self._log(f"[SEARCH] Web Search: {need}")
+        results = await asyncio.gather(
+            *[self._web_search(need) for need in research_needs],
+            return_exceptions=True
+        )
+        
+        research_results = {}
+        for need, result in zip(research_needs, results):
+            if isinstance(result, Exception):
+                research_results[need] = f"Research failed: {str(result)}"
+            else:
                 research_results[need] = result
-            except Exception as e:
-                research_results[need] = f"Research failed: {str(e)}"
         
         state["research"] = research_results
         self._log_node("research", "COMPLETED")
@@ -152,22 +243,26 @@ class GuesstimateSolver:
         """
         
         self._log_llm("Generating calculation steps from analysis and research")
-        response = await self.llm.ainvoke([SystemMessage(content=calc_prompt)])
+        response = await self._invoke_llm(calc_prompt)
         
         # Extract and perform calculations
-        calculations = []
         calc_steps = response.content.split('\n')
+        expressions = []
         
         for step in calc_steps:
-            if any(op in step for op in ['+', '-', '*', '/', 'sqrt']):
-                try:
-                    # Extract mathematical expression
-                    expr = self._extract_expression(step)
-                    if expr:
-                        result = await self._calculate_expression(expr)
-                        calculations.append({"expression": expr, "result": result})
-                except Exception as e:
-                    calculations.append({"expression": step, "error": str(e)})
+            # Extract mathematical expression
+            expr = self._extract_expression(step)
+            if expr:
+                expressions.append(expr)
+        
+        results = await self._calculate_expressions(expressions)
+        
+        calculations = []
+        for expr, result in zip(expressions, results):
+            if isinstance(result, Exception):
+                calculations.append({"expression": expr, "error": str(result)})
+            else:
+                calculations.append({"expression": expr, "result": result})
         
         state["calculations"] = calculations
         self._log_node("calculate", "COMPLETED")
@@ -194,7 +289,7 @@ class GuesstimateSolver:
         """
         
         self._log_llm("Validating results and checking reasonableness")
-        response = await self.llm.ainvoke([SystemMessage(content=validation_prompt)])
+        response = await self._invoke_llm(validation_prompt)
         
         state["validation"] = response.content
         state["final_estimate"] = final_result
@@ -228,51 +323,73 @@ class GuesstimateSolver:
         self._log_mcp("web-search", f"Searching for: {query}")
         return await self._call_http_tool("web-search", {"query": query})
     
-    async def _calculate_expression(self, expression: str) -> float:
-        """Calculate using HTTP calculator tool"""
-        self._log_mcp("calculator", f"Calculating: {expression}")
+    async def _calculate_expressions(self, expressions: List[str]) -> List[Any]:
+        """Calculate several expressions in one HTTP batch call
+        
+        Returns one entry per expression: the numeric result, or the exception
+        raised for that expression.
+        """
+        if not expressions:
+            return []
+        
+        self._log_mcp("calculator", f"Calculating batch of {len(expressions)} expressions")
         
         try:
-            content = await self._call_http_tool("calculator", {"expression": expression})
-            
-            # Extract numeric result from the response
-            import re
-            numbers = re.findall(r'[-+]?\d*\.?\d+', content)
-            if numbers:
-                numeric_result = float(numbers[-1])  # Get the last number (usually the result)
-                self._log_mcp("calculator", f"SUCCESS - Result: {numeric_result}")
-                return numeric_result
-            else:
-                self._log_mcp("calculator", "FAILED - No numeric result found")
-                raise ValueError(f"No numeric result in: {content}")
-                
+            items = await self._post_tool("calculator/batch", {"expressions": expressions})
         except Exception as e:
-            self._log_mcp("calculator", f"FAILED - {str(e)}")
-            raise e
+            return [e] * len(expressions)
+        
+        if not isinstance(items, list) or len(items) != len(expressions):
+            count = len(items) if isinstance(items, list) else "non-list"
+            e = ValueError(f"Expected {len(expressions)} batch results, got {count}")
+            self._log(f"[HTTP] Tool calculator/batch FAILED - {str(e)}")
+            return [e] * len(expressions)
+        
+        self._log("[HTTP] Tool calculator/batch SUCCESS")
+        results = []
+        for item in items:
+            try:
+                if not item.get("success", True):
+                    raise ValueError(item.get("error", "Unknown error"))
+                results.append(self._parse_calculator_result(item.get("result", "")))
+            except Exception as e:
+                self._log_mcp("calculator", f"FAILED - {str(e)}")
+                results.append(e)
+        return results
+    
+    def _parse_calculator_result(self, content: str) -> float:
+        """Extract the numeric result from a calculator tool response"""
+        numbers = _NUM_EXTRACT.findall(content)
+        if numbers:
+            numeric_result = float(numbers[-1])  # Get the last number (usually the result)
+            self._log_mcp("calculator", f"SUCCESS - Result: {numeric_result}")
+            return numeric_result
+        else:
+            self._log_mcp("calculator", "FAILED - No numeric result found")
+            raise ValueError(f"No numeric result in: {content}")
     
     def _extract_expression(self, text: str) -> str:
         """Extract mathematical expression from text"""
-        import re
+        # Skip prose lines cheaply before running any regex
+        if len(text) < 3 or (_OPERATOR_CHARS.isdisjoint(text) and 'sqrt' not in text):
+            return None
         
         # Look for expressions with = sign first
-        equals_pattern = r'([\d\+\-\*/\(\)\.\s%sqrt]+)\s*='
-        equals_matches = re.findall(equals_pattern, text)
+        equals_matches = _EQ_RE.findall(text)
         for match in equals_matches:
             clean_match = match.strip()
             if len(clean_match) > 1 and any(op in clean_match for op in ['+', '*', '/', 'sqrt']):
                 return clean_match
         
         # Look for standalone numbers and operations
-        number_pattern = r'\d+(?:\.\d+)?\s*[\+\-\*/]\s*\d+(?:\.\d+)?'
-        number_matches = re.findall(number_pattern, text)
-        if number_matches:
-            return number_matches[0].strip()
+        number_match = _NUM_RE.search(text)
+        if number_match:
+            return number_match.group(0).strip()
         
         # Look for sqrt expressions
-        sqrt_pattern = r'sqrt\(\d+(?:\.\d+)?\)'
-        sqrt_matches = re.findall(sqrt_pattern, text)
-        if sqrt_matches:
-            return sqrt_matches[0]
+        sqrt_match = _SQRT_RE.search(text)
+        if sqrt_match:
+            return sqrt_match.group(0)
         
         return None
     
@@ -281,6 +398,10 @@ class GuesstimateSolver:
         self._log(f"[START] Starting LangGraph workflow for: {problem}")
         
         initial_state = {"problem": problem}
-        result = await self.graph.ainvoke(initial_state)
-        self._log("[COMPLETE] LangGraph workflow completed successfully")
+        try:
+            result = await self.graph.ainvoke(initial_state)
+            self._log("[COMPLETE] LangGraph workflow completed successfully")
+        finally:
+            # Drain the log queue so callers printing the result see it after the logs
+            await asyncio.to_thread(flush_logs)
         return result["final_answer"]
\ No newline at end of file
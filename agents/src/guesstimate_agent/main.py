@@ -18,49 +18,56 @@ async def main():
     ]
     
     solver = GuesstimateSolver()
+    # Warm the HTTP pool in the background while the user reads the menu
+    warmup_task = asyncio.create_task(solver.warmup())
     
-    print("Guesstimate Agent - LangGraph Solver")
-    print("=" * 50)
-    
-    # Interactive mode
-    while True:
-        print("\nOptions:")
-        print("1. Use example problems")
-        print("2. Enter custom problem")
-        print("3. Exit")
-        
-        choice = input("\nChoose option (1-3): ").strip()
+    try:
+        print("Guesstimate Agent - LangGraph Solver")
+        print("=" * 50)
         
-        if choice == "1":
-            print("\nExample Problems:")
-            for i, problem in enumerate(problems, 1):
-                print(f"{i}. {problem}")
+        # Interactive mode
+        while True:
+            print("\nOptions:")
+            print("1. Use example problems")
+            print("2. Enter custom problem")
+            print("3. Exit")
+            
+            choice = (await asyncio.to_thread(input, "\nChoose option (1-3): ")).strip()
             
-            try:
-                prob_choice = int(input("\nSelect problem (1-3): ")) - 1
-                if 0 <= prob_choice < len(problems):
-                    problem = problems[prob_choice]
+            if choice == "1":
+                print("\nExample Problems:")
+                for i, problem in enumerate(problems, 1):
+                    print(f"{i}. {problem}")
+                
+                try:
+                    prob_choice = int(await asyncio.to_thread(input, "\nSelect problem (1-3): ")) - 1
+                    if 0 <= prob_choice < len(problems):
+                        problem = problems[prob_choice]
+                        print(f"\nSolving: {problem}")
+                        result = await solver.solve(problem)
+                        print("\n" + result)
+                    else:
+                        print("Invalid selection")
+                except ValueError:
+                    print("Invalid input")
+            
+            elif choice == "2":
+                problem = (await asyncio.to_thread(input, "\nEnter your guesstimate problem: ")).strip()
+                if problem:
                     print(f"\nSolving: {problem}")
                     result = await solver.solve(problem)
                     print("\n" + result)
-                else:
-                    print("Invalid selection")
-            except ValueError:
-                print("Invalid input")
-        
-        elif choice == "2":
-            problem = input("\nEnter your guesstimate problem: ").strip()
-            if problem:
-                print(f"\nSolving: {problem}")
-                result = await solver.solve(problem)
-                print("\n" + result)
-        
-        elif choice == "3":
-            print("Goodbye!")
-            break
-        
-        else:
-            print("Invalid option")
+            
+            elif choice == "3":
+                print("Goodbye!")
+                break
+            
+            else:
+                print("Invalid option")
+    finally:
+        # Runs on exit, EOF or Ctrl-C so the HTTP pool and LLM cache are released
+        warmup_task.cancel()
+        await solver.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file